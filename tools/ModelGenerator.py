@@ -7,8 +7,25 @@ import os
 import sys
 import pandas as pd
 import argparse
+import functools
+import importlib.util
+import json
 import re
 
+# Use the Rust based calamine engine to read Excel workbooks when python-calamine is installed
+# and pandas supports it (2.2 or later), otherwise let pandas pick the engine for the file type.
+PANDAS_VERSION = tuple(int(part) for part in pd.__version__.split('.')[:2])
+if PANDAS_VERSION >= (2, 2) and importlib.util.find_spec("python_calamine") is not None:
+    EXCEL_ENGINE = "calamine"
+else:
+    EXCEL_ENGINE = None
+
+# Use orjson to serialize JSON output when it is installed, otherwise fall back to the standard json module.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Enable debug mode via environment variable
 DEBUG = os.environ.get('DEBUG', 'false').lower() == 'true'
 
@@ -18,13 +35,17 @@ def debug_print(message):
         print(f"[DEBUG] {message}")
 
 # D2 reserved keywords that need to be escaped or avoided
-D2_RESERVED_KEYWORDS = {
+D2_RESERVED_KEYWORDS = frozenset({
     'link', 'label', 'style', 'shape', 'icon', 'tooltip', 'width', 'height',
     'class', 'classes', 'constraint', 'source-arrowhead', 'target-arrowhead',
     'direction', 'grid-rows', 'grid-columns', 'vars', 'scenarios', 'steps',
     'layers', 'near', 'top', 'left', 'right', 'bottom'
-}
+})
+
+# Any character outside [A-Za-z0-9_] requires a D2 identifier to be quoted
+D2_SPECIAL_CHARACTERS = re.compile(r'[^A-Za-z0-9_]')
 
+@functools.lru_cache(maxsize=4096)
 def sanitize_d2_identifier(name):
     """
     Sanitize identifiers for D2 to avoid reserved keywords and invalid characters.
@@ -34,18 +55,38 @@ def sanitize_d2_identifier(name):
     if not name:
         return name
 
-    # Work with a string representation and a normalized version for keyword checks
     name_str = str(name)
-    name_lower = name_str.lower().strip()
+
+    # Safe identifier: only alphanumeric and underscore characters and not a reserved keyword.
+    # Plain ASCII identifiers are recognised without scanning the name with the regex.
+    if (name_str.isascii() and name_str.isidentifier()) or not D2_SPECIAL_CHARACTERS.search(name_str):
+        if name_str.lower() not in D2_RESERVED_KEYWORDS:
+            return name_str
 
     # Quote reserved keywords or identifiers containing any special characters
-    if name_lower in D2_RESERVED_KEYWORDS or re.search(r'[^a-zA-Z0-9_]', name_str):
-        # Escape any quotes in the name
-        escaped_name = name_str.replace('"', '\\"')
-        return f'"{escaped_name}"'
+    # Escape any quotes in the name
+    escaped_name = name_str.replace('"', '\\"')
+    return f'"{escaped_name}"'
+
+# D2 relationship block emitted for every foreign key, formatted with the source and target table paths
+D2_RELATIONSHIP_TEMPLATE = (
+    '%s -> %s: {\n'
+    '  source-arrowhead: {\n'
+    '    shape: diamond\n'
+    '    style: {\n'
+    '      filled: true\n'
+    '    }\n'
+    '  }\n'
+    '  target-arrowhead: {\n'
+    '    shape: arrow\n'
+    '    style: {\n'
+    '      filled: false\n'
+    '    }\n'
+    '  }\n'
+    '  label: "has"\n'
+    '}\n\n'
+)
 
-    # Safe identifier: only alphanumeric and underscore characters
-    return name_str
 # Define Oracle to SQL Server data type mapping
 ORACLE_TO_SQLSERVER = {
     # Numeric types
@@ -78,6 +119,78 @@ ORACLE_TO_SQLSERVER = {
 }
 
 
+def _exit_with_error(message):
+    """Print an error message and exit."""
+    print(f"\nError: {message}")
+    sys.exit(1)
+
+
+def _open_workbook(excel_file, sheet_name, error=_exit_with_error):
+    """
+    Open the Excel workbook and check that it contains the data dictionary sheet.
+    Reports a missing workbook or sheet through error, which exits by default.
+    """
+    # Check if the excel workbook exists
+    if not os.path.exists(excel_file):
+        error(f"The specified Excel file '{excel_file}' does not exist.")
+
+    debug_print(f"Excel file found: {excel_file}")
+
+    # Check if the data dictionary sheet exists
+    xls = pd.ExcelFile(excel_file, engine=EXCEL_ENGINE)
+    debug_print(f"Excel engine: {xls.engine}")
+    debug_print(f"Available sheets: {xls.sheet_names}")
+
+    if sheet_name not in xls.sheet_names:
+        xls.close()
+        error(f"The specified Excel sheet '{sheet_name}' does not exist in the Excel file.")
+
+    debug_print(f"Sheet '{sheet_name}' found")
+
+    return xls
+
+
+def _load_sheet(excel_file, sheet_name, dtype=str, xls=None):
+    """
+    Read the data dictionary sheet from the Excel workbook into a DataFrame.
+    An already opened workbook can be passed in via xls, otherwise the workbook is opened and validated.
+    """
+    if xls is None:
+        xls = _open_workbook(excel_file, sheet_name)
+
+    # Read the Excel file
+    df = pd.read_excel(xls, sheet_name=sheet_name, dtype=dtype)
+    debug_print(f"Read {len(df)} rows from Excel file")
+
+    # calamine reads whitespace only cells as empty while openpyxl keeps the whitespace,
+    # so treat them as empty on both engines to keep the generated output engine independent
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        df[col] = df[col].mask(df[col].str.strip() == '')
+
+    return df
+
+
+def _dumps_json(data):
+    """
+    Serialize data to indented UTF-8 JSON bytes with orjson when available.
+    The json module fallback is configured to produce the same output as orjson.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def _strip_strings(df):
+    """
+    Return a copy of the DataFrame with leading and trailing whitespace stripped
+    from all string columns using vectorized pandas string operations.
+    """
+    df = df.copy()
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        df[col] = df[col].str.strip()
+    return df
+
+
 # Generate a database DDL script from Excel data dictionary in Oracle or SQL server format.
 # It reads the data dictionary from the specified Excel file and sheet, processes the data,
 # and generates the DDL script in the specified database format (Oracle or SQL Server) and
@@ -90,26 +203,12 @@ ORACLE_TO_SQLSERVER = {
 # The function also handles the conversion of Oracle data types to SQL Server data types as
 # well as other differences between Oracle and SQL server DDL syntax.
 #
-def generate_ddl(excel_file, data_dictionary_sheet, db_type="oracle", output_folder=None):
+# An already loaded data dictionary DataFrame can be passed in via df, or an opened workbook via xls,
+# to avoid re-reading the workbook.
+#
+def generate_ddl(excel_file, data_dictionary_sheet, db_type="oracle", output_folder=None, df=None, xls=None):
     debug_print(f"Starting DDL generation for {excel_file}, sheet: {data_dictionary_sheet}, db_type: {db_type}")
 
-    # Check if the excel workbook exists
-    if not os.path.exists(excel_file):
-        print(f"\nError: The specified Excel file '{excel_file}' does not exist.")
-        sys.exit(1)
-
-    debug_print(f"Excel file found: {excel_file}")
-
-    # Check if the data dictionary sheet exists
-    xls = pd.ExcelFile(excel_file)
-    debug_print(f"Available sheets: {xls.sheet_names}")
-
-    if data_dictionary_sheet not in xls.sheet_names:
-        print(f"\nError: The specified Excel sheet '{data_dictionary_sheet}' does not exist in the Excel file.")
-        sys.exit(1)
-
-    debug_print(f"Sheet '{data_dictionary_sheet}' found")
-
     # Determine the output folder
     if output_folder is None:
         output_folder = os.path.dirname(excel_file)
@@ -149,104 +248,90 @@ def generate_ddl(excel_file, data_dictionary_sheet, db_type="oracle", output_fol
     unique_keys = {}
 
     # Read the Excel file
-    df = pd.read_excel(excel_file, sheet_name=data_dictionary_sheet, dtype=str)
-    debug_print(f"Read {len(df)} rows from Excel file")
-
-    # Strip leading and trailing whitespace from all string columns
-    df = df.apply(lambda x: x.apply(lambda y: y.strip() if isinstance(y, str) else y), axis=0)
-    debug_print("Stripped whitespace from all string columns")
+    if df is None:
+        df = _load_sheet(excel_file, data_dictionary_sheet, xls=xls)
 
-    row_count = 0
-    for _, row in df.iterrows():
-        row_count += 1
-        if pd.isna(row['DOMAIN']):
-            continue
+    # Fill NaN values with empty strings and strip leading and trailing whitespace from all string columns
+    df = df.fillna('')
+    df = _strip_strings(df)
+    debug_print("Cleaned and prepared data")
 
-        table_name = row['TABLE_NAME']
-        column_name = row['COLUMN_NAME']
-        data_type = row['DATA_TYPE']
-        sql_data_type = row['SQL_DATA_TYPE']
-        data_length = row['DATA_LENGTH']
-        scale = row['SCALE']
-        not_null = row['NOT_NULL']
-        default = row['DEFAULT']
-        pk = row['PRIMARY_KEY']
-        fk_table = row['FKEY_TABLE']
-        fk_field = row['FKEY_COLUMN']
-        description = row['DESCRIPTION']
-        nk = row['NATURAL_KEY']
-
-        # Convert Oracle data type to SQL Server if needed
-        if db_type == "sqlserver":
-            # Split length/scale declaration off the Oracle data type
-            # and append it back after mapping to the SQL Server data type.
-            if "(" in sql_data_type:
-                base_type, params = sql_data_type.split("(", 1)
-                base_type = base_type.strip()
-                params = "(" + params
-
-            else:
-                base_type = sql_data_type
-                params = ""
-
-            if base_type in ORACLE_TO_SQLSERVER:
-                # Fix the default value for BOOLEAN type as INT
-                if base_type == "BOOLEAN":
-                    if default == "FALSE":
-                        default = "0"
-                    elif default == "TRUE":
-                        default = "1"
-
-                base_type = ORACLE_TO_SQLSERVER[base_type]
-
-            sql_data_type = base_type + params
-
-
-        if table_name not in tables:
-            tables[table_name] = []
-            primary_keys[table_name] = []
-            foreign_keys[table_name] = []
-            comments[table_name] = []
-            unique_keys[table_name] = []
-
-        column_def = f"{column_name} {sql_data_type}"
-
-        # Add data length and scale
-        if pd.notna(data_length) and data_length:
-            column_def += f"({data_length}"
-            if pd.notna(scale) and scale:
-                column_def += f",{scale}"
-            column_def += ")"
-
-        # Add BINARY_AI collation for NTEXT natural keys
-        # Must appear BEFORE the NOT NULL constraint (Not sure about the Default constraint)
-        # Requires setting Oracle MAX_STRING_SIZE option to EXTENDED
-        # https://docs.oracle.com/en/database/oracle/oracle-database/23/refrn/MAX_STRING_SIZE.html
-        #Comment out for now until databases are upgraded to  Oracle23c
-        #        if db_type == "oracle" and nk == 'Y' and data_type == 'NTEXT':
-        #            column_def += " COLLATE BINARY_AI"
-
-        # Add DEFAULT Constraints
-        if pd.notna(default) and default:
-            column_def += f" DEFAULT ({default})"
-
-        # Add NOT NULL Constraints
-        if not_null == 'Y':
-            column_def += " NOT NULL"
-
-        tables[table_name].append(column_def)
-
-        if pk == 'Y':
-            primary_keys[table_name].append(column_name)
-
-        if pd.notna(fk_table) and fk_table and pd.notna(fk_field) and fk_field:
-            foreign_keys[table_name].append((column_name, fk_table, fk_field))
-
-        if pd.notna(description) and description:
-            comments[table_name].append((column_name, description))
-
-        if nk == 'Y':
-            unique_keys[table_name].append(column_name)
+    # Convert Oracle data types to SQL Server if needed
+    # (str.partition returns no columns for an empty sheet, so there is nothing to convert then)
+    if db_type == "sqlserver" and not df.empty:
+        # Split length/scale declaration off the Oracle data type
+        # and append it back after mapping to the SQL Server data type.
+        type_parts = df['SQL_DATA_TYPE'].str.partition('(')
+        base_type = type_parts[0].str.strip()
+        params = type_parts[1] + type_parts[2]
+
+        # Fix the default value for BOOLEAN type as INT
+        is_boolean = base_type.eq("BOOLEAN")
+        df.loc[is_boolean & df['DEFAULT'].eq("FALSE"), 'DEFAULT'] = "0"
+        df.loc[is_boolean & df['DEFAULT'].eq("TRUE"), 'DEFAULT'] = "1"
+
+        df['SQL_DATA_TYPE'] = base_type.map(ORACLE_TO_SQLSERVER).fillna(base_type) + params
+        debug_print("Converted Oracle data types to SQL Server")
+
+    # Build the column definitions for the whole sheet with vectorized string operations
+    # Add data length and scale
+    scale_part = (',' + df['SCALE']).where(df['SCALE'] != '', '')
+    length_part = ('(' + df['DATA_LENGTH'] + scale_part + ')').where(df['DATA_LENGTH'] != '', '')
+
+    # Add BINARY_AI collation for NTEXT natural keys
+    # Must appear BEFORE the NOT NULL constraint (Not sure about the Default constraint)
+    # Requires setting Oracle MAX_STRING_SIZE option to EXTENDED
+    # https://docs.oracle.com/en/database/oracle/oracle-database/23/refrn/MAX_STRING_SIZE.html
+    #Comment out for now until databases are upgraded to  Oracle23c
+    #    if db_type == "oracle":
+    #        is_ntext_nk = df['NATURAL_KEY'].eq('Y') & df['DATA_TYPE'].eq('NTEXT')
+    #        length_part = length_part + pd.Series(' COLLATE BINARY_AI', index=df.index).where(is_ntext_nk, '')
+
+    # Add DEFAULT Constraints
+    default_part = (' DEFAULT (' + df['DEFAULT'] + ')').where(df['DEFAULT'] != '', '')
+
+    # Add NOT NULL Constraints
+    not_null_part = pd.Series(' NOT NULL', index=df.index).where(df['NOT_NULL'].eq('Y'), '')
+
+    df['COLUMN_DEF'] = df['COLUMN_NAME'] + ' ' + df['SQL_DATA_TYPE'] + length_part + default_part + not_null_part
+
+    # Evaluate the Y/N key flag columns once for the whole sheet
+    df['IS_PRIMARY_KEY'] = df['PRIMARY_KEY'].eq('Y')
+    df['IS_NATURAL_KEY'] = df['NATURAL_KEY'].eq('Y')
+
+    # Skip rows that are not assigned to a domain
+    row_count = len(df)
+    df = df[df['DOMAIN'] != '']
+
+    key_columns = ['COLUMN_NAME', 'IS_PRIMARY_KEY', 'FKEY_TABLE', 'FKEY_COLUMN', 'DESCRIPTION', 'IS_NATURAL_KEY']
+
+    # Build the definitions for each table from its group of rows, in order of first appearance
+    for table_name, table_df in df.groupby('TABLE_NAME', sort=False):
+        table_primary_keys = []
+        table_foreign_keys = []
+        table_comments = []
+        table_unique_keys = []
+
+        # Pull the required columns out as arrays once rather than building a Series per row
+        arrays = [table_df[col].to_numpy() for col in key_columns]
+        for column_name, pk, fk_table, fk_field, description, nk in zip(*arrays):
+            if pk:
+                table_primary_keys.append(column_name)
+
+            if fk_table and fk_field:
+                table_foreign_keys.append((column_name, fk_table, fk_field))
+
+            if description:
+                table_comments.append((column_name, description))
+
+            if nk:
+                table_unique_keys.append(column_name)
+
+        tables[table_name] = table_df['COLUMN_DEF'].tolist()
+        primary_keys[table_name] = table_primary_keys
+        foreign_keys[table_name] = table_foreign_keys
+        comments[table_name] = table_comments
+        unique_keys[table_name] = table_unique_keys
 
     debug_print(f"Processed {row_count} rows")
     debug_print(f"Found {len(tables)} tables")
@@ -256,19 +341,17 @@ def generate_ddl(excel_file, data_dictionary_sheet, db_type="oracle", output_fol
     with open(procedures_file, mode='r') as file:
         procedures_content = file.read()
 
-    # Write the Procedures content to the output file
-    with open(output_file, mode='w') as file:
-        file.write(procedures_content)
-        file.write("\n")
+    # Build the whole script in memory, starting with the Procedures content
+    parts = [procedures_content, "\n"]
 
-        # Then emit all the DDL procedure calls to the output file
+    # Then emit all the DDL procedure calls
 
-        # The format of the procedure calls is different for each database type based on the database type.
+    # The format of the procedure calls is different for each database type based on the database type.
 
-        # SQL Server
-        if db_type == "sqlserver":
-            drop_format = "EXEC #DROP_TABLE '{0}'\nGO\n"
-            create_table_format = """-- Create table {0}
+    # SQL Server
+    if db_type == "sqlserver":
+        drop_format = "EXEC #DROP_TABLE '{0}'\nGO\n"
+        create_table_format = """-- Create table {0}
 EXEC #CREATE_TABLE
     @tableName = '{0}',
     @query = 'CREATE TABLE {0} (
@@ -277,16 +360,16 @@ EXEC #CREATE_TABLE
 GO
 
 """
-            create_pk_format = "EXEC #CREATE_PRIMARY_KEY @tableName = '{0}', @columnList = '{1}'\nGO\n"
-            create_nk_format = "EXEC #CREATE_NATURAL_KEY @tableName = '{0}', @columnList = '{1}'\nGO\n"
-            add_comment_format = "EXEC #ADD_COLUMN_COMMENT @tableName = '{0}', @columnName = '{1}', @comment = '{2}'\nGO\n"
-            create_fk_format = "EXEC #CREATE_FOREIGN_KEY @tableName = '{0}', @columnName = '{1}', @foreignTableName = '{2}', @foreignColumnName = '{3}'\nGO\n"
-            end_script = ""
-
-        # Oracle
-        else:
-            drop_format = "DROP_TABLE('{0}');\n"
-            create_table_format = """-- Create table {0}
+        create_pk_format = "EXEC #CREATE_PRIMARY_KEY @tableName = '{0}', @columnList = '{1}'\nGO\n"
+        create_nk_format = "EXEC #CREATE_NATURAL_KEY @tableName = '{0}', @columnList = '{1}'\nGO\n"
+        add_comment_format = "EXEC #ADD_COLUMN_COMMENT @tableName = '{0}', @columnName = '{1}', @comment = '{2}'\nGO\n"
+        create_fk_format = "EXEC #CREATE_FOREIGN_KEY @tableName = '{0}', @columnName = '{1}', @foreignTableName = '{2}', @foreignColumnName = '{3}'\nGO\n"
+        end_script = ""
+
+    # Oracle
+    else:
+        drop_format = "DROP_TABLE('{0}');\n"
+        create_table_format = """-- Create table {0}
 CREATE_TABLE(
  '{0}',
  'CREATE TABLE {0} (
@@ -296,47 +379,51 @@ CREATE_TABLE(
 );
 
 """
-            create_pk_format = "CREATE_PRIMARY_KEY('{0}', '{1}');\n"
-            create_nk_format = "CREATE_NATURAL_KEY('{0}', '{1}');\n"
-            add_comment_format = "ADD_COLUMN_COMMENT('{0}', '{1}', '{2}');\n"
-            create_fk_format = "CREATE_FOREIGN_KEY('{0}', '{1}', '{2}', '{3}');\n"
-            end_script = "END;\n"
+        create_pk_format = "CREATE_PRIMARY_KEY('{0}', '{1}');\n"
+        create_nk_format = "CREATE_NATURAL_KEY('{0}', '{1}');\n"
+        add_comment_format = "ADD_COLUMN_COMMENT('{0}', '{1}', '{2}');\n"
+        create_fk_format = "CREATE_FOREIGN_KEY('{0}', '{1}', '{2}', '{3}');\n"
+        end_script = "END;\n"
 
-        # Write DROP statements
-        for table_name, columns in tables.items():
-            file.write(drop_format.format(table_name))
-        file.write("\n")
+    # Write DROP statements
+    for table_name, columns in tables.items():
+        parts.append(drop_format.format(table_name))
+    parts.append("\n")
 
-        # Write CREATE TABLE statements
-        for table_name, columns in tables.items():
-            file.write(create_table_format.format(table_name, ",\n    ".join(columns)))
+    # Write CREATE TABLE statements
+    for table_name, columns in tables.items():
+        parts.append(create_table_format.format(table_name, ",\n    ".join(columns)))
 
-            if primary_keys[table_name]:
-                pk_columns = ", ".join(primary_keys[table_name])
-                file.write(create_pk_format.format(table_name, pk_columns))
+        if primary_keys[table_name]:
+            pk_columns = ", ".join(primary_keys[table_name])
+            parts.append(create_pk_format.format(table_name, pk_columns))
 
-            if unique_keys[table_name]:
-                unique_columns = ", ".join(unique_keys[table_name])
-                file.write(create_nk_format.format(table_name, unique_columns))
+        if unique_keys[table_name]:
+            unique_columns = ", ".join(unique_keys[table_name])
+            parts.append(create_nk_format.format(table_name, unique_columns))
 
-            file.write("\n")
+        parts.append("\n")
 
-            for column_name, description in comments[table_name]:
-                # Replace single quotes in the description with double quotes to avoid SQL syntax errors
-                safe_description = description.replace("'", "''")
-                file.write(add_comment_format.format(table_name, column_name, safe_description))
+        for column_name, description in comments[table_name]:
+            # Replace single quotes in the description with double quotes to avoid SQL syntax errors
+            safe_description = description.replace("'", "''")
+            parts.append(add_comment_format.format(table_name, column_name, safe_description))
 
-            file.write("\n")
+        parts.append("\n")
 
-        # Generate Foreign Keys
-        for table_name, columns in tables.items():
-            for column_name, fk_table, fk_field in foreign_keys[table_name]:
-                file.write(create_fk_format.format(table_name, column_name, fk_table, fk_field))
+    # Generate Foreign Keys
+    for table_name, columns in tables.items():
+        for column_name, fk_table, fk_field in foreign_keys[table_name]:
+            parts.append(create_fk_format.format(table_name, column_name, fk_table, fk_field))
 
-        if end_script:
-            file.write(end_script)
+    if end_script:
+        parts.append(end_script)
 
-        print(f"\nDDL Generation complete. '{output_file}' created for {db_type}.")
+    # Write the output file in a single call
+    with open(output_file, mode='w') as file:
+        file.write("".join(parts))
+
+    print(f"\nDDL Generation complete. '{output_file}' created for {db_type}.")
 
 
 # Generate a D2 diagram from the Excel data dictionary.
@@ -345,16 +432,12 @@ CREATE_TABLE(
 # The D2 diagram is a visual representation of the database schema, including tables, columns,
 # primary keys, foreign keys, and relationships between tables.
 #
-def generate_d2(excel_file, sheet_name, output_folder=None):
+# An already loaded data dictionary DataFrame can be passed in via df, or an opened workbook via xls,
+# to avoid re-reading the workbook.
+#
+def generate_d2(excel_file, sheet_name, output_folder=None, df=None, xls=None):
     debug_print(f"Starting D2 generation for {excel_file}, sheet: {sheet_name}")
 
-    # Check if the Excel file exists
-    if not os.path.exists(excel_file):
-        print(f"\nError: The specified Excel file '{excel_file}' does not exist.")
-        sys.exit(1)
-
-    debug_print(f"Excel file found: {excel_file}")
-
     # Determine the output folder
     if output_folder is None:
         output_folder = os.path.dirname(excel_file)
@@ -369,68 +452,83 @@ def generate_d2(excel_file, sheet_name, output_folder=None):
     debug_print(f"Output file will be: {output_file}")
 
     # Read the Excel file
-    df = pd.read_excel(excel_file, sheet_name=sheet_name)
-    debug_print(f"Read {len(df)} rows from Excel file")
+    if df is None:
+        df = _load_sheet(excel_file, sheet_name, xls=xls)
 
     # Clean and prepare data
     df = df.fillna('')
-    df = df.apply(lambda x: x.apply(lambda y: y.strip() if isinstance(y, str) else y), axis=0)
+    df = _strip_strings(df)
     debug_print("Cleaned and prepared data")
 
     # Get unique tables with their domains
     tables = df[['TABLE_NAME', 'DOMAIN']].drop_duplicates().sort_values(['DOMAIN', 'TABLE_NAME'])
     debug_print(f"Found {len(tables)} unique tables")
 
+    # Evaluate the primary and foreign key flags once for the whole sheet
+    df['IS_PRIMARY_KEY'] = df['PRIMARY_KEY'].eq('Y')
+    df['HAS_FOREIGN_KEY'] = df['FKEY_TABLE'].ne('')
+
+    # Group the rows by table in a single pass
+    table_groups = dict(tuple(df.groupby('TABLE_NAME', sort=False)))
+
     # Get columns for each table
     all_tables = {}
     table_count = 0
-    for _, row in tables.iterrows():
-        if row['DOMAIN'] == '':
+    for table_name, domain in zip(tables['TABLE_NAME'].to_numpy(), tables['DOMAIN'].to_numpy()):
+        if domain == '':
             continue
 
-        table_name = row['TABLE_NAME']
-        domain = row['DOMAIN']
         table_count += 1
 
         debug_print(f"Processing table {table_count}: {table_name} in domain {domain}")
 
         # Get columns for this table
-        table_df = df[df['TABLE_NAME'] == table_name]
+        table_df = table_groups[table_name]
         columns = []
-        fk_count = 0
-        for _, col_row in table_df.iterrows():
-            if col_row['DOMAIN'] == '':
+        fks = []
+        column_arrays = [table_df[col].to_numpy() for col in
+                         ['DOMAIN', 'COLUMN_NAME', 'SQL_DATA_TYPE', 'IS_PRIMARY_KEY', 'HAS_FOREIGN_KEY',
+                          'FKEY_TABLE', 'FKEY_COLUMN']]
+        for col_domain, column_name, sql_data_type, pk, has_fk, fk_table, fk_column in zip(*column_arrays):
+            if col_domain == '':
                 continue
 
-            has_fk = col_row['FKEY_TABLE'] != ''
-            if has_fk:
-                fk_count += 1
+            if has_fk and fk_column:
+                fks.append((column_name, fk_table, fk_column))
 
             column = {
-                'name': col_row['COLUMN_NAME'],
-                'type': col_row['SQL_DATA_TYPE'],
-                'pk': col_row['PRIMARY_KEY'] == 'Y',
-                'fk': has_fk,
-                'fk_table': col_row['FKEY_TABLE'],
-                'fk_column': col_row['FKEY_COLUMN']
+                'name': column_name,
+                'id': sanitize_d2_identifier(column_name),
+                'type': sql_data_type,
+                'pk': pk,
+                'fk': has_fk
             }
             columns.append(column)
 
-        debug_print(f"  Table {table_name} has {len(columns)} columns and {fk_count} foreign keys")
+        debug_print(f"  Table {table_name} has {len(columns)} columns and {len(fks)} foreign keys")
 
         all_tables[table_name] = {
             'domain': domain,
-            'columns': columns
+            'columns': columns,
+            'fks': fks
         }
 
     debug_print(f"Processed {table_count} tables total")
 
+    # Sanitize the table and domain identifiers once for reuse by the table and relationship output
+    table_id_by_name = {table_name: sanitize_d2_identifier(table_name) for table_name in all_tables}
+    domain_id_by_table = {
+        table_name: sanitize_d2_identifier(table_info['domain'].lower().replace(' ', '_'))
+        for table_name, table_info in all_tables.items()
+    }
+    other_domain_id = sanitize_d2_identifier('other')
+
     # Start building D2 content
-    d2_content = '# Cobra Web Data Model (D2 Format)\n\n'
+    parts = ['# Cobra Web Data Model (D2 Format)\n\n']
 
     # Add styles
-    # d2_content += '# Define styles for domains\n'
-    # d2_content += 'styles: {\n'
+    # parts.append('# Define styles for domains\n')
+    # parts.append('styles: {\n')
 
     # Define colors for domains
     # domain_colors = {
@@ -453,17 +551,17 @@ def generate_d2(excel_file, sheet_name, output_folder=None):
     # Add domain styles
     # for domain, color in domain_colors.items():
     #    domain_id = domain.lower().replace(' ', '_')
-    #    d2_content += f'  {domain_id}: {{\n'
-    #    d2_content += f'    style.fill: "{color}"\n'
-    #    d2_content += f'    style.border-radius: 8\n'
-    #    d2_content += f'  }}\n'
+    #    parts.append(f'  {domain_id}: {{\n')
+    #    parts.append(f'    style.fill: "{color}"\n')
+    #    parts.append(f'    style.border-radius: 8\n')
+    #    parts.append(f'  }}\n')
 
     # Add table style
-    # d2_content += '  table: {\n'
-    # d2_content += '    style.border-radius: 4\n'
-    # d2_content += '    shadow: true\n'
-    # d2_content += '  }\n'
-    # d2_content += '}\n\n'
+    # parts.append('  table: {\n')
+    # parts.append('    style.border-radius: 4\n')
+    # parts.append('    shadow: true\n')
+    # parts.append('  }\n')
+    # parts.append('}\n\n')
 
     # Group tables by domain
     domains = {}
@@ -479,20 +577,20 @@ def generate_d2(excel_file, sheet_name, output_folder=None):
         domain_id = sanitize_d2_identifier(domain.lower().replace(' ', '_'))
         debug_print(f"Creating domain: {domain} (sanitized: {domain_id})")
 
-        d2_content += f'# {domain} Domain\n'
-        d2_content += f'{domain_id}: {{\n'
-        d2_content += f'  label: "{domain} Domain"\n'
+        parts.append(f'# {domain} Domain\n')
+        parts.append(f'{domain_id}: {{\n')
+        parts.append(f'  label: "{domain} Domain"\n')
 
         for table_name in tables:
             table_info = all_tables[table_name]
-            table_id = sanitize_d2_identifier(table_name)
+            table_id = table_id_by_name[table_name]
             debug_print(f"  Creating table: {table_name} (sanitized: {table_id})")
 
-            d2_content += f'  {table_id}: {{\n'
-            d2_content += f'    shape: sql_table\n'
+            parts.append(f'  {table_id}: {{\n')
+            parts.append(f'    shape: sql_table\n')
 
             for column in table_info['columns']:
-                column_name = sanitize_d2_identifier(column['name'])
+                column_name = column['id']
                 constraints = []
                 if column['pk']:
                     constraints.append('primary_key')
@@ -503,52 +601,35 @@ def generate_d2(excel_file, sheet_name, output_folder=None):
                 if constraints:
                     constraints_str = f' {{constraint: [{",".join(constraints)}]}}'
 
-                d2_content += f'    {column_name}: {column["type"]}{constraints_str}\n'
+                parts.append(f'    {column_name}: {column["type"]}{constraints_str}\n')
 
-            d2_content += f'  }}\n\n'
+            parts.append(f'  }}\n\n')
 
-        d2_content += f'}}\n\n'
+        parts.append(f'}}\n\n')
 
     # Add relationships using simpler D2 syntax
     debug_print("Generating relationships...")
-    d2_content += '# Define relationships\n'
+    parts.append('# Define relationships\n')
     relationship_count = 0
 
     for table_name, table_info in all_tables.items():
-        table_id = sanitize_d2_identifier(table_name)
-        source_domain = sanitize_d2_identifier(table_info['domain'].lower().replace(' ', '_'))
-
-        for column in table_info['columns']:
-            if column['fk'] and column['fk_table'] and column['fk_column']:
-                target_table = column['fk_table']
-                target_table_id = sanitize_d2_identifier(target_table)
-                target_domain = sanitize_d2_identifier(
-                    all_tables.get(target_table, {}).get('domain', 'Other').lower().replace(' ', '_')
-                )
-
-                relationship_count += 1
-                debug_print(f"  Relationship {relationship_count}: {target_domain}.{target_table_id} -> {source_domain}.{table_id}")
-
-                # Use proper D2 relationship syntax with multi-line format
-                d2_content += f'{target_domain}.{target_table_id} -> {source_domain}.{table_id}: {{\n'
-                d2_content += '  source-arrowhead: {\n'
-                d2_content += '    shape: diamond\n'
-                d2_content += '    style: {\n'
-                d2_content += '      filled: true\n'
-                d2_content += '    }\n'
-                d2_content += '  }\n'
-                d2_content += '  target-arrowhead: {\n'
-                d2_content += '    shape: arrow\n'
-                d2_content += '    style: {\n'
-                d2_content += '      filled: false\n'
-                d2_content += '    }\n'
-                d2_content += '  }\n'
-                d2_content += '  label: "has"\n'
-                d2_content += '}\n\n'
+        table_id = table_id_by_name[table_name]
+        source_domain = domain_id_by_table[table_name]
+
+        for column_name, target_table, target_column in table_info['fks']:
+            target_table_id = table_id_by_name.get(target_table) or sanitize_d2_identifier(target_table)
+            target_domain = domain_id_by_table.get(target_table, other_domain_id)
+
+            relationship_count += 1
+            debug_print(f"  Relationship {relationship_count}: {target_domain}.{target_table_id} -> {source_domain}.{table_id}")
+
+            # Use proper D2 relationship syntax with multi-line format
+            parts.append(D2_RELATIONSHIP_TEMPLATE % (f'{target_domain}.{target_table_id}', f'{source_domain}.{table_id}'))
 
     debug_print(f"Generated {relationship_count} relationships")
 
     # Write to the file
+    d2_content = ''.join(parts)
     debug_print(f"Writing D2 content to {output_file}")
     with open(output_file, 'w') as f:
         f.write(d2_content)
@@ -559,20 +640,12 @@ def generate_d2(excel_file, sheet_name, output_folder=None):
 
 # Generate an unstructured JSON file from the Excel data dictionary.
 #
-def generate_plain_json(excel_file, sheet_name, output_folder=None):
+# An already loaded data dictionary DataFrame can be passed in via df, or an opened workbook via xls,
+# to avoid re-reading the workbook.
+#
+def generate_plain_json(excel_file, sheet_name, output_folder=None, df=None, xls=None):
     debug_print(f"Starting plain JSON generation for {excel_file}, sheet: {sheet_name}")
 
-    # Check if the excel workbook exists
-    if not os.path.exists(excel_file):
-        print(f"\nError: The specified Excel file '{excel_file}' does not exist.")
-        sys.exit(1)
-
-    # Check if the data dictionary sheet exists
-    xls = pd.ExcelFile(excel_file)
-    if sheet_name not in xls.sheet_names:
-        print(f"\nError: The specified Excel sheet '{sheet_name}' does not exist in the Excel file.")
-        sys.exit(1)
-
     # Determine the output folder
     if output_folder is None:
         output_folder = os.path.dirname(excel_file)
@@ -586,15 +659,18 @@ def generate_plain_json(excel_file, sheet_name, output_folder=None):
     debug_print(f"Output file will be: {output_file}")
 
     # Read the Excel file
-    df = pd.read_excel(excel_file, sheet_name=sheet_name, dtype=str)
-    debug_print(f"Read {len(df)} rows from Excel file")
+    if df is None:
+        df = _load_sheet(excel_file, sheet_name, xls=xls)
 
-    # Convert the DataFrame to JSON format
-    json_data = df.to_json(orient='records', indent=4)
-    debug_print(f"JSON data size: {len(json_data)} characters")
+    # Convert the DataFrame rows straight to a list of records, writing empty cells as null
+    # Header cells can be numbers, so use their string form as the JSON keys
+    columns = [str(col) for col in df.columns]
+    records = [dict(zip(columns, row)) for row in df.to_numpy(dtype=object, na_value=None).tolist()]
+    json_data = _dumps_json(records)
+    debug_print(f"JSON data size: {len(json_data)} bytes")
 
     # Write the JSON data to the output file
-    with open(output_file, 'w') as json_file:
+    with open(output_file, 'wb') as json_file:
         json_file.write(json_data)
 
     print(f"Plain JSON file generation complete: {output_file}")
@@ -602,28 +678,15 @@ def generate_plain_json(excel_file, sheet_name, output_folder=None):
 
 # Generate a structured JSON file grouped by DOMAINS and TABLES from the Excel data dictionary.
 #
-def generate_structured_json(excel_file, sheet_name, output_folder=None):
+# An already loaded data dictionary DataFrame can be passed in via df, or an opened workbook via xls,
+# to avoid re-reading the workbook.
+#
+def generate_structured_json(excel_file, sheet_name, output_folder=None, df=None, xls=None):
     """
     Generate a JSON file grouped by DOMAINS and TABLES from the Excel data dictionary.
     """
-    import json
-    import os
-    import pandas as pd
-    import sys
-
     debug_print(f"Starting structured JSON generation for {excel_file}, sheet: {sheet_name}")
 
-    # Check if the Excel workbook exists
-    if not os.path.exists(excel_file):
-        print(f"\nError: The specified Excel file '{excel_file}' does not exist.")
-        sys.exit(1)
-
-    # Check if the data dictionary sheet exists
-    xls = pd.ExcelFile(excel_file)
-    if sheet_name not in xls.sheet_names:
-        print(f"\nError: The specified Excel sheet '{sheet_name}' does not exist in the Excel file.")
-        sys.exit(1)
-
     # Determine the output folder
     if output_folder is None:
         output_folder = os.path.dirname(excel_file)
@@ -637,53 +700,51 @@ def generate_structured_json(excel_file, sheet_name, output_folder=None):
     debug_print(f"Output file will be: {output_file}")
 
     # Read the Excel file
-    df = pd.read_excel(excel_file, sheet_name=sheet_name, dtype=str)
-    debug_print(f"Read {len(df)} rows from Excel file")
+    if df is None:
+        df = _load_sheet(excel_file, sheet_name, xls=xls)
 
     # Fill NaN values with empty strings
     df = df.fillna('')
 
+    # Split the table level columns from the column level data, dropping COMMENTS
+    key_columns = ['DOMAIN', 'TABLE_NAME', 'TABLE_FLAGS', 'TABLE_DESCRIPTION']
+    excluded_columns = set(key_columns) | {'COMMENTS'}
+    column_columns = [col for col in df.columns if col not in excluded_columns]
+    keys = df[key_columns].to_numpy().tolist()
+    values = df[column_columns].to_numpy().tolist()
+
+    # Header cells can be numbers, so use their string form as the JSON keys
+    column_keys = [str(col) for col in column_columns]
+
     # Group data by DOMAINS and TABLES
     grouped_data = {"DOMAINS": {}}
     debug_print("Starting to group data by domains and tables")
-    for _, row in df.iterrows():
+    for (domain, table_name, table_flags, table_description), row_values in zip(keys, values):
 
-        if row['DOMAIN'] == '':
+        if domain == '':
             continue
 
-        domain = row['DOMAIN']
-        table_name = row['TABLE_NAME']
-        table_flags = row['TABLE_FLAGS']
-        table_description = row['TABLE_DESCRIPTION']
-
         if domain not in grouped_data["DOMAINS"]:
             grouped_data["DOMAINS"][domain] = {"TABLES": {}}
 
-        if table_name not in grouped_data["DOMAINS"][domain]["TABLES"]:
-            grouped_data["DOMAINS"][domain]["TABLES"][table_name] = {
+        domain_tables = grouped_data["DOMAINS"][domain]["TABLES"]
+        if table_name not in domain_tables:
+            domain_tables[table_name] = {
                 "TABLE_FLAGS": table_flags,
                 "TABLE_DESCRIPTION": table_description,
                 "COLUMNS": []
             }
 
-        # Remove TABLE_FLAGS from column data
-        column_data = row.to_dict()
-        column_data.pop('DOMAIN', None)
-        column_data.pop('TABLE_NAME', None)
-        column_data.pop('TABLE_FLAGS', None)
-        column_data.pop('TABLE_DESCRIPTION', None)
-        column_data.pop('COMMENTS', None)
-
         # Append column data to the table
-        grouped_data["DOMAINS"][domain]["TABLES"][table_name]["COLUMNS"].append(column_data)
+        domain_tables[table_name]["COLUMNS"].append(dict(zip(column_keys, row_values)))
 
     debug_print(f"Grouped data contains {len(grouped_data['DOMAINS'])} domains")
     for domain, domain_data in grouped_data["DOMAINS"].items():
         debug_print(f"  Domain '{domain}' has {len(domain_data['TABLES'])} tables")
 
     # Write the grouped data to a JSON file
-    with open(output_file, 'w') as json_file:
-        json.dump(grouped_data, json_file, indent=4)
+    with open(output_file, 'wb') as json_file:
+        json_file.write(_dumps_json(grouped_data))
 
     debug_print(f"JSON file written successfully")
     print(f"Structured JSON file generation complete: {output_file}")
@@ -702,14 +763,19 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
+    # Open and validate the workbook once, reporting problems as argument errors,
+    # and read the data dictionary to share between the generators
+    with _open_workbook(args.model, args.sheet, error=parser.error) as xls:
+        df = _load_sheet(args.model, args.sheet, xls=xls)
+
     if args.mode in ["ddl", "all"]:
-        generate_ddl(args.model, args.sheet, args.dbtype, args.out)
+        generate_ddl(args.model, args.sheet, args.dbtype, args.out, df=df)
 
     if args.mode in ["d2", "all"]:
-        generate_d2(args.model, args.sheet, args.out)
+        generate_d2(args.model, args.sheet, args.out, df=df)
 
     if args.mode in ["pjson", "all"]:
-        generate_plain_json(args.model, args.sheet, args.out)
+        generate_plain_json(args.model, args.sheet, args.out, df=df)
 
     if args.mode in ["sjson", "all"]:
-        generate_structured_json(args.model, args.sheet, args.out)
+        generate_structured_json(args.model, args.sheet, args.out, df=df)